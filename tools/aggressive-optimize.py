@@ -8,56 +8,67 @@ import re
 from pathlib import Path
 import sys
 
+CAPABILITY_LIST_RE = re.compile(r'(### .+)\n((?:- ✅ \*\*.+?\*\*:.+\n)+)')
+CODE_BLOCK_RE = re.compile(r'```[\s\S]*?```')
+# Tool guidelines and task file sections share a terminator, so match both in one scan
+VERBOSE_SECTION_RE = re.compile(
+    r'(## Tool Usage Guidelines\n\n### Execute Tool.*?(?=\n---\n\n))'
+    r'|(## Task File Integration.*?(?=\n---\n\n))',
+    re.DOTALL
+)
+EXCESS_BLANK_LINES_RE = re.compile(r'\n\n\n+')
+BEST_PRACTICES_RE = re.compile(r'### (.+?) Best Practices.*?\n\n', re.DOTALL)
+BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+
+COMPACT_TOOL_USAGE = '## Tool Usage\n**Execute**: Database ops, psql, migrations, testing\n**Edit**: Database code, configs, migrations\n**Create**: Services, schemas, docs\nSee templates for details.\n'
+COMPACT_TASK_FILES = '## Task Files\n**Input**: `/tasks/tasks-[prd]-[domain].md`\n**Output**: Update with `[~]` in-progress, `[x]` completed, metrics\n**Format**: Status + before/after metrics + changes\n'
+
 def optimize_for_ai(content: str) -> str:
     """Aggressively optimize content for AI token efficiency"""
     
     # 1. Consolidate capability lists - convert verbose bullets to compact format
-    content = re.sub(
-        r'(### .+)\n((?:- ✅ \*\*.+?\*\*:.+\n)+)',
+    content = CAPABILITY_LIST_RE.sub(
         lambda m: convert_capabilities_to_compact(m.group(1), m.group(2)),
         content
     )
     
     # 2. Remove redundant code examples - keep only 1-2 key examples
-    code_blocks = re.findall(r'```[\s\S]*?```', content)
-    if len(code_blocks) > 4:
+    spans = [m.span() for m in CODE_BLOCK_RE.finditer(content)]
+    if len(spans) > 4:
         # Keep first 2 substantive examples, remove rest
-        for i, block in enumerate(code_blocks[2:], start=2):
-            if len(block) > 500:  # Large code blocks
-                content = content.replace(block, '', 1)
+        # Rebuild from the kept slices in one pass rather than str.replace per block
+        parts = []
+        last = 0
+        for start, end in spans[2:]:
+            if end - start > 500:  # Large code blocks
+                parts.append(content[last:start])
+                last = end
+        parts.append(content[last:])
+        content = ''.join(parts)
     
     # 3. Simplify tool guidelines - reference template
-    content = re.sub(
-        r'## Tool Usage Guidelines\n\n### Execute Tool.*?(?=\n---\n\n)',
-        '## Tool Usage\n**Execute**: Database ops, psql, migrations, testing\n**Edit**: Database code, configs, migrations\n**Create**: Services, schemas, docs\nSee templates for details.\n',
-        content,
-        flags=re.DOTALL
-    )
-    
     # 4. Consolidate task file I/O - make ultra-compact
-    content = re.sub(
-        r'## Task File Integration.*?(?=\n---\n\n)',
-        '## Task Files\n**Input**: `/tasks/tasks-[prd]-[domain].md`\n**Output**: Update with `[~]` in-progress, `[x]` completed, metrics\n**Format**: Status + before/after metrics + changes\n',
-        content,
-        flags=re.DOTALL
-    )
+    # The lazy DOTALL scans run to the end of the file from every heading when
+    # their terminator is missing, so only run them if a match is possible
+    if '\n---\n\n' in content and (
+            '## Tool Usage Guidelines' in content or '## Task File Integration' in content):
+        content = VERBOSE_SECTION_RE.sub(
+            lambda m: COMPACT_TOOL_USAGE if m.lastindex == 1 else COMPACT_TASK_FILES,
+            content
+        )
     
     # 5. Remove excessive whitespace
-    content = re.sub(r'\n\n\n+', '\n\n', content)
+    content = EXCESS_BLANK_LINES_RE.sub('\n\n', content)
     
     # 6. Compact "Best Practices" - bullets only
-    content = re.sub(
-        r'### (.+?) Best Practices.*?\n\n',
-        '',
-        content,
-        flags=re.DOTALL
-    )
+    if ' Best Practices' in content:
+        content = BEST_PRACTICES_RE.sub('', content)
     
     return content
 
 def convert_capabilities_to_compact(header: str, bullets: str) -> str:
     """Convert verbose capability bullets to compact format"""
-    items = re.findall(r'\*\*(.+?)\*\*', bullets)
+    items = BOLD_RE.findall(bullets)
     compact = f"{header}\n**Handles**: {', '.join(items)}\n\n"
     return compact
 
@@ -6,27 +6,71 @@ Analyzes NDJSON logs to provide insights on droid performance and usage
 
 import json
 import argparse
+import mmap
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict, Counter
 import statistics
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+TIMED_EVENT_TYPES = frozenset({'task.started', 'task.completed', 'droid.started', 'droid.completed'})
+
+
+try:
+    # C parser that handles the 'Z' suffix natively
+    from ciso8601 import parse_datetime as parse_timestamp
+except ImportError:
+    def parse_timestamp(value):
+        """Parse an ISO-8601 timestamp, accepting a trailing 'Z' for UTC"""
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return datetime.fromisoformat(value)
+
 
 def load_ndjson(file_path):
     """Load NDJSON file and return list of events"""
     events = []
     try:
-        with open(file_path, 'r') as f:
-            for line in f:
-                if line.strip():
-                    events.append(json.loads(line))
+        with open(file_path, 'rb') as f:
+            # mmap cannot map an empty file
+            if os.fstat(f.fileno()).st_size == 0:
+                return events
+            # Let the kernel page the log in and slice lines straight out of it
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = 0
+                size = len(mm)
+                while pos < size:
+                    end = mm.find(b'\n', pos)
+                    if end == -1:
+                        end = size
+                    if end > pos:
+                        line = mm[pos:end]
+                        # isspace() tests for blank lines without allocating a stripped copy
+                        if not line.isspace():
+                            events.append(_loads(line))
+                    pos = end + 1
     except FileNotFoundError:
         print(f"File not found: {file_path}")
         return []
     return events
 
 
+def event_error(event):
+    """Return the error message of a failed event without building an empty details dict"""
+    details = event.get('details')
+    if details:
+        return details.get('error', 'Unknown error')
+    return 'Unknown error'
+
+
 def analyze_events(events):
     """Analyze events and return metrics"""
     metrics = {
@@ -34,54 +78,58 @@ def analyze_events(events):
         'runs': defaultdict(dict),
         'tasks': defaultdict(dict),
         'droids': Counter(),
-        'event_types': Counter(),
+        'event_types': Counter(event.get('event_type') for event in events),
         'durations': []
     }
 
     task_start_times = {}
     droid_start_times = {}
 
+    # Hoist hot lookups out of the per-event loop
+    tasks = metrics['tasks']
+    droids = metrics['droids']
+    durations = metrics['durations']
+
     for event in events:
-        event_type = event.get('event_type')
-        run_id = event.get('run_id')
-        timestamp = datetime.fromisoformat(event['timestamp'].replace('Z', '+00:00'))
+        get = event.get
+        event_type = get('event_type')
+
+        # Only these types use the timestamp, so skip parsing it for the rest
+        if event_type not in TIMED_EVENT_TYPES:
+            if event_type == 'task.failed':
+                task_id = get('task_id')
+                tasks[task_id] = {
+                    'status': 'failed',
+                    'error': event_error(event),
+                    'run_id': get('run_id')
+                }
+                task_start_times.pop(task_id, None)
+            continue
 
-        metrics['event_types'][event_type] += 1
+        timestamp = parse_timestamp(event['timestamp'])
 
         if event_type == 'task.started':
-            task_id = event.get('task_id')
-            task_start_times[task_id] = timestamp
+            task_start_times[get('task_id')] = timestamp
 
         elif event_type == 'task.completed':
-            task_id = event.get('task_id')
+            task_id = get('task_id')
             if task_id in task_start_times:
-                duration = (timestamp - task_start_times[task_id]).total_seconds()
-                metrics['durations'].append(duration)
-                metrics['tasks'][task_id] = {
+                duration = (timestamp - task_start_times.pop(task_id)).total_seconds()
+                durations.append(duration)
+                tasks[task_id] = {
                     'duration': duration,
                     'status': 'completed',
-                    'droid_id': event.get('droid_id'),
-                    'run_id': run_id
+                    'droid_id': get('droid_id'),
+                    'run_id': get('run_id')
                 }
-                del task_start_times[task_id]
-
-        elif event_type == 'task.failed':
-            task_id = event.get('task_id')
-            metrics['tasks'][task_id] = {
-                'status': 'failed',
-                'error': event.get('details', {}).get('error', 'Unknown error'),
-                'run_id': run_id
-            }
-            if task_id in task_start_times:
-                del task_start_times[task_id]
 
         elif event_type == 'droid.started':
-            droid_id = event.get('droid_id')
+            droid_id = get('droid_id')
             droid_start_times[droid_id] = timestamp
-            metrics['droids'][droid_id] += 1
+            droids[droid_id] += 1
 
-        elif event_type == 'droid.completed':
-            droid_id = event.get('droid_id')
+        else:  # droid.completed
+            droid_id = get('droid_id')
             if droid_id in droid_start_times:
                 duration = (timestamp - droid_start_times[droid_id]).total_seconds()
                 # Store droid duration if needed
@@ -92,47 +140,67 @@ def analyze_events(events):
 
 def print_summary(metrics):
     """Print analysis summary"""
-    print(f"\n📊 Droid Forge Audit Analysis")
-    print("=" * 50)
-
-    print(f"Total Events: {metrics['total_events']}")
-    print(f"Unique Tasks: {len(metrics['tasks'])}")
-    print(f"Unique Droids Used: {len(metrics['droids'])}")
+    # Collect the report and write it in one call instead of a print() per line
+    lines = []
+    out = lines.append
+    out(f"\n📊 Droid Forge Audit Analysis")
+    out("=" * 50)
+
+    out(f"Total Events: {metrics['total_events']}")
+    out(f"Unique Tasks: {len(metrics['tasks'])}")
+    out(f"Unique Droids Used: {len(metrics['droids'])}")
+
+    # Bucket tasks by status in a single pass
+    completed_tasks = 0
+    failed_tasks_details = []
+    for task in metrics['tasks'].values():
+        status = task['status']
+        if status == 'completed':
+            completed_tasks += 1
+        elif status == 'failed':
+            failed_tasks_details.append(task)
 
     # Task completion rates
-    completed_tasks = sum(1 for task in metrics['tasks'].values() if task['status'] == 'completed')
-    failed_tasks = sum(1 for task in metrics['tasks'].values() if task['status'] == 'failed')
+    failed_tasks = len(failed_tasks_details)
     total_tasks = completed_tasks + failed_tasks
 
     if total_tasks > 0:
         completion_rate = (completed_tasks / total_tasks) * 100
-        print(f"Task Completion Rate: {completion_rate:.1f}% ({completed_tasks}/{total_tasks})")
-        print(f"Failed Tasks: {failed_tasks}")
+        out(f"Task Completion Rate: {completion_rate:.1f}% ({completed_tasks}/{total_tasks})")
+        out(f"Failed Tasks: {failed_tasks}")
 
     # Duration statistics
     if metrics['durations']:
-        print(f"\n⏱️  Task Duration Statistics:")
-        print(f"Average: {statistics.mean(metrics['durations']):.1f}s")
-        print(f"Median: {statistics.median(metrics['durations']):.1f}s")
-        print(f"Min: {min(metrics['durations']):.1f}s")
-        print(f"Max: {max(metrics['durations']):.1f}s")
+        # Sort once and read median/min/max off the sorted list
+        durations = sorted(metrics['durations'])
+        mid = len(durations) // 2
+        if len(durations) % 2:
+            median = durations[mid]
+        else:
+            median = (durations[mid - 1] + durations[mid]) / 2
+        out(f"\n⏱️  Task Duration Statistics:")
+        out(f"Average: {statistics.fmean(durations):.1f}s")
+        out(f"Median: {median:.1f}s")
+        out(f"Min: {durations[0]:.1f}s")
+        out(f"Max: {durations[-1]:.1f}s")
 
     # Event type breakdown
-    print(f"\n📋 Event Types:")
+    out(f"\n📋 Event Types:")
     for event_type, count in metrics['event_types'].most_common():
-        print(f"  {event_type}: {count}")
+        out(f"  {event_type}: {count}")
 
     # Droid usage
-    print(f"\n🤖 Droid Usage:")
+    out(f"\n🤖 Droid Usage:")
     for droid_id, count in metrics['droids'].most_common(10):
-        print(f"  {droid_id}: {count} times")
+        out(f"  {droid_id}: {count} times")
 
     # Failed tasks details
-    failed_tasks_details = [task for task in metrics['tasks'].values() if task['status'] == 'failed']
     if failed_tasks_details:
-        print(f"\n❌ Failed Tasks:")
+        out(f"\n❌ Failed Tasks:")
         for task in failed_tasks_details:
-            print(f"  Task {task.get('task_id', 'unknown')}: {task['error']}")
+            out(f"  Task {task.get('task_id', 'unknown')}: {task['error']}")
+
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def main():
@@ -4,12 +4,55 @@ enhance-droids.py - Add tool usage guidelines and task file I/O to all droids
 More reliable than bash for complex text manipulation
 """
 
+import functools
 import os
 import re
+import sys
 from pathlib import Path
 
 DROID_DIR = Path(".factory/droids")
 
+# Sections to insert before, in order of preference
+INSERTION_SECTIONS = (
+    "## Integration", "## Manager Droid", "## Best Practices",
+    "## Usage Guidelines", "## Success Criteria", "## Metrics"
+)
+INSERTION_RE = re.compile(
+    "^(" + "|".join(re.escape(section) for section in INSERTION_SECTIONS) + ")",
+    re.MULTILINE
+)
+
+# Droid name prefix -> droid type. Listed in priority order: when several
+# prefixes match a name, the first one listed wins.
+PREFIX_CATEGORY = {
+    # Assessment droids
+    **dict.fromkeys([
+        "caching-assessment", "code-smell-assessment", "cognitive-complexity-assessment",
+        "database-performance-assessment", "debugging-assessment", "drizzle-assessment",
+        "nextjs15-assessment", "security-assessment", "security-audit", "test-assessment",
+        "trpc-assessment", "typescript-assessment", "typescript-integration-assessment",
+        "bug-hunter", "impact-analyzer", "plan-review"
+    ], "assessment"),
+    # Action droids
+    **dict.fromkeys([
+        "bug-fix", "code-refactoring", "security-fix", "typescript-fix",
+        "unit-test", "frontend-engineer", "backend-engineer",
+        "database-performance", "drizzle-orm-specialist",
+        "nextjs15-specialist", "typescript-professional"
+    ], "action"),
+    # Orchestration droids
+    **dict.fromkeys([
+        "manager-orchestrator", "auto-pr", "reliability",
+        "task-manager", "ai-dev-tasks-integrator",
+        "git-workflow-orchestrator", "biome"
+    ], "orchestration"),
+    # Integration droids
+    **dict.fromkeys([
+        "better-auth-integration", "trpc-tanstack-integration",
+        "typescript-integration", "caching-specialist"
+    ], "integration"),
+}
+
 # Assessment droid tool guidelines template
 ASSESSMENT_TOOLS = """---
 
@@ -186,123 +229,150 @@ Coordinates delegation and tracks overall progress across all task files.
 ---
 """
 
+# Full enhancement text per droid type, assembled once
+ENHANCEMENTS = {
+    "assessment": ASSESSMENT_TOOLS + ASSESSMENT_TASK_IO,
+    "action": ACTION_TOOLS + ACTION_TASK_IO,
+    "orchestration": "\n---\n\n" + ORCHESTRATION_TASK_IO,
+    # Integration droids - treat as action droids
+    "integration": ACTION_TOOLS + ACTION_TASK_IO,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def section_pattern(section_title):
+    """Compiled heading pattern for a section title"""
+    return re.compile(rf'^##\s+{re.escape(section_title)}', re.MULTILINE)
+
 
 def has_section(content, section_title):
     """Check if content already has a specific section"""
-    pattern = re.compile(rf'^##\s+{re.escape(section_title)}', re.MULTILINE)
-    return bool(pattern.search(content))
+    # The heading can only match if the title text appears at all
+    if section_title not in content:
+        return False
+    return bool(section_pattern(section_title).search(content))
 
 
 def find_insertion_point(content):
     """Find the best insertion point for tool guidelines"""
-    # Try to insert before common end sections
-    for section in ["## Integration", "## Manager Droid", "## Best Practices", 
-                    "## Usage Guidelines", "## Success Criteria", "## Metrics"]:
-        pattern = re.compile(rf'^({section})', re.MULTILINE)
-        match = pattern.search(content)
-        if match:
+    # Try to insert before common end sections - one scan, then pick by preference
+    first_seen = {}
+    for match in INSERTION_RE.finditer(content):
+        section = match.group(1)
+        # Nothing can beat the most preferred section, so stop scanning there
+        if section == INSERTION_SECTIONS[0]:
             return match.start()
+        first_seen.setdefault(section, match.start())
+    for section in INSERTION_SECTIONS:
+        if section in first_seen:
+            return first_seen[section]
     
     # If no good insertion point, append at end (before final --- if present)
-    if content.rstrip().endswith("---"):
-        return len(content.rstrip()) - 3
+    stripped = content.rstrip()
+    if stripped.endswith("---"):
+        return len(stripped) - 3
     return len(content)
 
 
-def enhance_droid(filepath, droid_type):
+def build_prefix_trie(prefix_category):
+    """Build a character trie from a {prefix: category} mapping"""
+    trie = {}
+    for rank, (prefix, category) in enumerate(prefix_category.items()):
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        # None marks the end of a prefix; rank keeps the mapping's priority order
+        node[None] = (rank, category)
+    return trie
+
+
+PREFIX_TRIE = build_prefix_trie(PREFIX_CATEGORY)
+
+
+def classify_droid(stem, trie=PREFIX_TRIE):
+    """Return the category of the earliest-listed prefix that stem starts with"""
+    best = None
+    node = trie
+    for char in stem:
+        node = node.get(char)
+        if node is None:
+            break
+        match = node.get(None)
+        if match is not None and (best is None or match < best):
+            best = match
+    return best[1] if best else None
+
+
+def enhance_droid(filepath, droid_type, log=print):
     """Enhance a single droid file"""
-    print(f"Enhancing: {filepath.name}")
+    log(f"Enhancing: {filepath.name}")
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = filepath.read_text(encoding='utf-8')
     
     # Check if already enhanced
     if has_section(content, "Tool Usage Guidelines"):
-        print(f"  ✓ Already has tool guidelines, skipping")
+        log(f"  ✓ Already has tool guidelines, skipping")
         return False
     
     # Find insertion point
     insert_pos = find_insertion_point(content)
     
     # Build enhancement content
-    if droid_type == "assessment":
-        enhancement = ASSESSMENT_TOOLS + ASSESSMENT_TASK_IO
-    elif droid_type == "action":
-        enhancement = ACTION_TOOLS + ACTION_TASK_IO
-    elif droid_type == "orchestration":
-        enhancement = "\n---\n\n" + ORCHESTRATION_TASK_IO
-    else:
-        # Integration droids - treat as action droids
-        enhancement = ACTION_TOOLS + ACTION_TASK_IO
+    enhancement = ENHANCEMENTS[droid_type]
     
     # Insert enhancement
-    new_content = content[:insert_pos] + "\n" + enhancement + "\n" + content[insert_pos:]
+    new_content = "".join((content[:insert_pos], "\n", enhancement, "\n", content[insert_pos:]))
     
     # Write back
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(new_content)
+    filepath.write_text(new_content, encoding='utf-8')
     
-    print(f"  ✓ Enhanced successfully")
+    log(f"  ✓ Enhanced successfully")
     return True
 
 
+def process_droid(md_file):
+    """Classify and enhance one droid, returning (enhanced, buffered log lines, error)"""
+    stem = md_file.stem.replace("-droid-forge", "")
+    droid_type = classify_droid(stem)
+    
+    lines = []
+    try:
+        enhanced = bool(droid_type) and enhance_droid(md_file, droid_type, log=lines.append)
+    except (OSError, UnicodeError) as error:
+        # Keep going so the report shows what happened to every other droid
+        lines.append(f"  ✗ Failed: {error}")
+        return False, lines, error
+    return enhanced, lines, None
+
+
 def main():
     print("=" * 60)
     print("Droid Enhancement Script (Python)")
     print("=" * 60)
     print()
     
-    # Classification
-    assessment_droids = [
-        "caching-assessment", "code-smell-assessment", "cognitive-complexity-assessment",
-        "database-performance-assessment", "debugging-assessment", "drizzle-assessment",
-        "nextjs15-assessment", "security-assessment", "security-audit", "test-assessment",
-        "trpc-assessment", "typescript-assessment", "typescript-integration-assessment",
-        "bug-hunter", "impact-analyzer", "plan-review"
-    ]
-    
-    action_droids = [
-        "bug-fix", "code-refactoring", "security-fix", "typescript-fix",
-        "unit-test", "frontend-engineer", "backend-engineer",
-        "database-performance", "drizzle-orm-specialist",
-        "nextjs15-specialist", "typescript-professional"
-    ]
-    
-    orchestration_droids = [
-        "manager-orchestrator", "auto-pr", "reliability",
-        "task-manager", "ai-dev-tasks-integrator",
-        "git-workflow-orchestrator", "biome"
-    ]
-    
-    integration_droids = [
-        "better-auth-integration", "trpc-tanstack-integration",
-        "typescript-integration", "caching-specialist"
-    ]
-    
     enhanced_count = 0
+    failed = []
     
     # Process all markdown files in droid directory
     for md_file in sorted(DROID_DIR.glob("*.md")):
-        stem = md_file.stem.replace("-droid-forge", "")
-        
-        if any(stem.startswith(a) for a in assessment_droids):
-            if enhance_droid(md_file, "assessment"):
-                enhanced_count += 1
-        elif any(stem.startswith(a) for a in action_droids):
-            if enhance_droid(md_file, "action"):
-                enhanced_count += 1
-        elif any(stem.startswith(o) for o in orchestration_droids):
-            if enhance_droid(md_file, "orchestration"):
-                enhanced_count += 1
-        elif any(stem.startswith(i) for i in integration_droids):
-            if enhance_droid(md_file, "integration"):
-                enhanced_count += 1
+        enhanced, lines, error = process_droid(md_file)
+        # One write per droid rather than a print() per line
+        sys.stdout.write("".join(f"{line}\n" for line in lines))
+        if enhanced:
+            enhanced_count += 1
+        if error:
+            failed.append(md_file.name)
     
     print()
     print("=" * 60)
     print(f"✓ Enhancement complete! Enhanced {enhanced_count} droids")
     print("=" * 60)
     print()
+    
+    if failed:
+        sys.exit(f"✗ Failed to enhance {len(failed)} droid(s): {', '.join(failed)}")
+    
     print("Next steps:")
     print("  1. Review changes: git diff")
     print("  2. Test a few droids")
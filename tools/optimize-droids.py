@@ -10,12 +10,19 @@ from pathlib import Path
 
 DROID_DIR = Path(".factory/droids")
 
+CODE_BLOCK_RE = re.compile(r'```[\s\S]*?```')
+BASH_BLOCK_RE = re.compile(r'```bash[\s\S]*?```')
+TOOL_GUIDELINES_RE = re.compile(r'## Tool Usage Guidelines.*?(?=\n## |\Z)', re.DOTALL)
+TASK_SECTION_RE = re.compile(r'## Task File Integration.*?(?=\n## |\Z)', re.DOTALL)
+BLANK_LINES_RE = re.compile(r'\n\n\n+')
+HEADING_RE = re.compile(r'^##+ ', re.MULTILINE)
+
 def optimize_code_examples(content):
     """
     Reduce number of code examples - keep 1-2 most important ones
     """
     # Find all code blocks
-    code_blocks = re.findall(r'```[\s\S]*?```', content)
+    code_blocks = CODE_BLOCK_RE.findall(content)
     
     # If more than 3 code blocks in a section, it's too much
     # This is a simple heuristic - manual review recommended
@@ -25,8 +32,12 @@ def optimize_tool_guidelines(content):
     """
     Consolidate tool guidelines - they're very repetitive across droids
     """
+    # Cheap substring check before running the DOTALL search
+    if "## Tool Usage Guidelines" not in content:
+        return content
+    
     # Check if guidelines are overly verbose
-    guidelines_match = re.search(r'## Tool Usage Guidelines.*?(?=\n## |\Z)', content, re.DOTALL)
+    guidelines_match = TOOL_GUIDELINES_RE.search(content)
     
     if not guidelines_match:
         return content
@@ -46,7 +57,9 @@ def optimize_repetitive_patterns(content):
     Remove repetitive workflow patterns and consolidate
     """
     # Look for repeated bash function examples
-    bash_blocks = re.findall(r'```bash[\s\S]*?```', content)
+    if "```bash" not in content:
+        return content
+    bash_blocks = BASH_BLOCK_RE.findall(content)
     
     if len(bash_blocks) > 5:
         print(f"    → Found {len(bash_blocks)} bash examples - consider consolidating")
@@ -57,7 +70,10 @@ def optimize_task_file_examples(content):
     """
     Task file I/O sections are quite long - reference templates instead
     """
-    task_match = re.search(r'## Task File Integration.*?(?=\n## |\Z)', content, re.DOTALL)
+    if "## Task File Integration" not in content:
+        return content
+    
+    task_match = TASK_SECTION_RE.search(content)
     
     if not task_match:
         return content
@@ -77,7 +93,7 @@ def remove_excessive_whitespace(content):
     Remove excessive blank lines (more than 2 consecutive)
     """
     # Replace 3+ blank lines with 2 blank lines
-    content = re.sub(r'\n\n\n+', '\n\n', content)
+    content = BLANK_LINES_RE.sub('\n\n', content)
     return content
 
 def consolidate_lists(content):
@@ -91,9 +107,9 @@ def get_optimization_metrics(content):
     """
     Calculate metrics for optimization report
     """
-    lines = len(content.split('\n'))
-    code_blocks = len(re.findall(r'```', content)) // 2
-    headings = len(re.findall(r'^##+ ', content, re.MULTILINE))
+    lines = content.count('\n') + 1
+    code_blocks = content.count('```') // 2
+    headings = sum(1 for _ in HEADING_RE.finditer(content))
     
     return {
         'lines': lines,
@@ -108,8 +124,7 @@ def analyze_droid(filepath):
     """
     print(f"\nAnalyzing: {filepath.name}")
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = filepath.read_text(encoding='utf-8')
     
     metrics = get_optimization_metrics(content)
     print(f"  Lines: {metrics['lines']}, Code blocks: {metrics['code_blocks']}, Headings: {metrics['headings']}")